@@ -5,22 +5,37 @@ FastAPI server for OCR processing and sustainability data extraction
 
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import uvicorn
-import pytesseract
+import os
+
+# One single-threaded engine per core: Tesseract's OpenMP threads compete with
+# each other when several engines run side by side, and parallelism comes from
+# the OCR worker processes instead. Spawned workers inherit this setting.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+from tesserocr import PyTessBaseAPI, PSM, OEM
 from PIL import Image
+import cv2
+import numpy as np
+import fitz  # PyMuPDF
 import io
 import re
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime
+import asyncio
+import hashlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+import time
 import logging
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Sustainability OCR API", version="1.0.0")
+app = FastAPI(title="Sustainability OCR API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -31,14 +46,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# OCR runs in worker processes so it never blocks the event loop. Each worker
+# holds its own resident Tesseract engine, created once when the worker starts,
+# so the language model is not reloaded on every request. Engines run with one
+# OpenMP thread, and every server worker process starts its own private pool,
+# so the cores are split evenly between the WEB_WORKERS pools. Keep WEB_WORKERS
+# small so each pool has several OCR workers to spread a document's pages over.
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "1"))
+OCR_WORKERS = max(1, (os.cpu_count() or 1) // WEB_WORKERS)
+OCR_EXECUTOR: Optional[ProcessPoolExecutor] = None
+_API: Optional[PyTessBaseAPI] = None
+
+# Extracted text of recent uploads, keyed by a hash of the file content, so
+# re-uploading the same bill skips OCR entirely
+OCR_CACHE_SIZE = 1024
+_OCR_CACHE: "OrderedDict[str, str]" = OrderedDict()
+
+# Result of the last OCR probe, refreshed in the background every
+# HEALTH_CACHE_SECONDS so /health never waits on the OCR queue. The probe queues
+# behind OCR work, so a slow probe only means the pool is busy; only a failed
+# probe (e.g. a broken pool) counts as unhealthy.
+HEALTH_CACHE_SECONDS = 30
+_HEALTH_CACHE = {"ok": False, "error": "OCR probe has not completed yet"}
+_HEALTH_TASK: Optional[asyncio.Task] = None
+
+# Last formatted response timestamp as (epoch second, ISO string)
+_TIMESTAMP_CACHE = (0, "")
+
+# Characters the OCR engine is allowed to emit
+CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz₹.,:-/'
+
+# Engine variables: input is already binarized, so skip the inversion pass, and
+# the extraction regexes don't need dictionary correction, so skip the word lists
+TESS_VARIABLES = {
+    'tessedit_char_whitelist': CHAR_WHITELIST,
+    'tessedit_do_invert': '0',
+    'load_system_dawg': '0',
+    'load_freq_dawg': '0'
+}
+
+# Resolution PDF pages are rendered at before OCR
+PDF_RENDER_DPI = 200
+
 class SustainabilityExtractor:
     """Extract sustainability data from utility bills and invoices"""
     
     # India-specific patterns for different utilities
     PATTERNS = {
-        'energy': {
+        'electricity': {
             'usage': [
-                r'(\d+(?:\.\d+)?)\s*(?:kwh|kw|units?|यूनिट)',
+                r'(\d+(?:\.\d+)?)[ \t]*(?:kwh|kw|units?|यूनिट)',
                 r'consumption[:\s]*(\d+(?:\.\d+)?)',
                 r'total\s*units[:\s]*(\d+(?:\.\d+)?)'
             ],
@@ -55,7 +112,7 @@ class SustainabilityExtractor:
         },
         'water': {
             'usage': [
-                r'(\d+(?:\.\d+)?)\s*(?:litres?|liters?|l\b|kilolitres?)',
+                r'(\d+(?:\.\d+)?)[ \t]*(?:litres?|liters?|l\b|kilolitres?)',
                 r'consumption[:\s]*(\d+(?:\.\d+)?)\s*(?:kl|litres?)',
                 r'water\s*consumed[:\s]*(\d+(?:\.\d+)?)'
             ],
@@ -71,7 +128,7 @@ class SustainabilityExtractor:
         },
         'fuel': {
             'usage': [
-                r'(\d+(?:\.\d+)?)\s*(?:litres?|liters?|l\b)',
+                r'(\d+(?:\.\d+)?)[ \t]*(?:litres?|liters?|l\b)',
                 r'quantity[:\s]*(\d+(?:\.\d+)?)',
                 r'fuel[:\s]*(\d+(?:\.\d+)?)\s*(?:ltr|litres?)'
             ],
@@ -88,21 +145,29 @@ class SustainabilityExtractor:
     }
     
     @staticmethod
-    def preprocess_image(image: Image.Image) -> Image.Image:
-        """Preprocess image for better OCR accuracy"""
-        # Convert to grayscale
-        if image.mode != 'L':
-            image = image.convert('L')
+    def preprocess_image(image: Image.Image) -> np.ndarray:
+        """Preprocess image for better OCR accuracy, returning an 8-bit binary array"""
+        # Convert to grayscale in a single step for every input mode
+        if image.mode == 'L':
+            arr = np.asarray(image)
+        elif image.mode == 'RGB':
+            arr = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY)
+        else:
+            arr = np.asarray(image.convert('L'))
         
         # Resize if too small
-        width, height = image.size
+        height, width = arr.shape
         if width < 800:
             scale_factor = 800 / width
             new_width = int(width * scale_factor)
             new_height = int(height * scale_factor)
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            arr = cv2.resize(arr, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+        
+        # Binarize with Otsu's threshold so Tesseract can skip its own pass
+        arr = cv2.GaussianBlur(arr, (3, 3), 0)
+        _, arr = cv2.threshold(arr, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
         
-        return image
+        return arr
     
     @staticmethod
     def extract_text_from_image(image: Image.Image) -> str:
@@ -111,74 +176,53 @@ class SustainabilityExtractor:
             # Preprocess image
             processed_image = SustainabilityExtractor.preprocess_image(image)
             
-            # OCR configuration for better accuracy
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz₹.,:-/\s'
-            
-            # Extract text
-            text = pytesseract.image_to_string(processed_image, config=custom_config)
+            # Extract text with the worker's resident engine
+            height, width = processed_image.shape
+            _API.SetImageBytes(processed_image.tobytes(), width, height, 1, width)
+            text = _API.GetUTF8Text()
             return text.strip()
         except Exception as e:
-            logger.error(f"OCR extraction failed: {e}")
+            logger.error("OCR extraction failed: %s", e)
             return ""
     
     @staticmethod
     def identify_bill_type(text: str) -> str:
         """Identify the type of utility bill"""
-        text_lower = text.lower()
-        
-        # Check for electricity keywords
-        electricity_keywords = ['electricity', 'power', 'kwh', 'units', 'mseb', 'bescom', 'tneb']
-        if any(keyword in text_lower for keyword in electricity_keywords):
-            return 'electricity'
-        
-        # Check for water keywords
-        water_keywords = ['water', 'municipal', 'jal', 'litres', 'kilolitres']
-        if any(keyword in text_lower for keyword in water_keywords):
-            return 'water'
-        
-        # Check for fuel keywords
-        fuel_keywords = ['petrol', 'diesel', 'fuel', 'indian oil', 'bpcl', 'hpcl']
-        if any(keyword in text_lower for keyword in fuel_keywords):
-            return 'fuel'
-        
-        return 'other'
+        # The first keyword found in the text decides the bill type
+        match = _BILL_RE.search(text)
+        return match.lastgroup if match else 'other'
     
     @staticmethod
-    def extract_numeric_value(text: str, patterns: list) -> Optional[float]:
+    def extract_numeric_value(text: str, patterns: List[re.Pattern]) -> Optional[float]:
         """Extract numeric value using regex patterns"""
         for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
+            match = pattern.search(text)
+            if match:
                 try:
                     # Clean and convert to float
-                    value_str = matches[0].replace(',', '')
+                    value_str = match.group(1).replace(',', '')
                     return float(value_str)
-                except (ValueError, IndexError):
+                except ValueError:
                     continue
         return None
     
     @staticmethod
-    def extract_vendor_info(text: str, patterns: list) -> Optional[str]:
+    def extract_vendor_info(text: str, patterns: List[re.Pattern]) -> Optional[str]:
         """Extract vendor information"""
         for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0].title()
+            match = pattern.search(text)
+            if match:
+                raw = match.group(1)
+                return _VENDOR_CANON.get(raw.lower(), raw.title())
         return None
     
     @staticmethod
     def extract_date(text: str) -> Optional[str]:
         """Extract bill date"""
-        date_patterns = [
-            r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
-            r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{2,4})',
-            r'date[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0]
+        for pattern in _DATE_RES:
+            match = pattern.search(text)
+            if match:
+                return match.group(1)
         return None
     
     @classmethod
@@ -198,18 +242,9 @@ class SustainabilityExtractor:
             patterns = cls.PATTERNS[bill_type]
             
             # Extract usage data
-            if bill_type == 'electricity':
-                usage = cls.extract_numeric_value(text, patterns['usage'])
-                if usage:
-                    result['energyUsage'] = usage
-            elif bill_type == 'water':
-                usage = cls.extract_numeric_value(text, patterns['usage'])
-                if usage:
-                    result['waterConsumption'] = usage
-            elif bill_type == 'fuel':
-                usage = cls.extract_numeric_value(text, patterns['usage'])
-                if usage:
-                    result['fuelConsumption'] = usage
+            usage = cls.extract_numeric_value(text, patterns['usage'])
+            if usage and bill_type in USAGE_FIELDS:
+                result[USAGE_FIELDS[bill_type]] = usage
             
             # Extract amount
             amount = cls.extract_numeric_value(text, patterns['amount'])
@@ -232,6 +267,201 @@ class SustainabilityExtractor:
         
         return result
 
+# Result key holding the usage figure for each bill type
+USAGE_FIELDS = {
+    'electricity': 'energyUsage',
+    'water': 'waterConsumption',
+    'fuel': 'fuelConsumption'
+}
+
+# India-specific emission factors
+EMISSION_FACTORS = {
+    'electricity': 0.82,  # kg CO2/kWh
+    'water': 0.0003,      # kg CO2/L
+    'petrol': 2.31,       # kg CO2/L
+    'diesel': 2.68,       # kg CO2/L
+    'waste': 0.5          # kg CO2/kg
+}
+
+# Emission factor per bill type, in the order of _EMISSION_BILL_TYPES
+_EMISSION_BILL_TYPES = ('electricity', 'water', 'fuel')
+_EMISSION_INDEX = {bill_type: index for index, bill_type in enumerate(_EMISSION_BILL_TYPES)}
+_EMISSION_FACTOR_VECTOR = np.array([
+    EMISSION_FACTORS['electricity'],
+    EMISSION_FACTORS['water'],
+    EMISSION_FACTORS['diesel']  # Assume diesel if not specified
+])
+
+# Compile every pattern once at import time instead of on each request
+SustainabilityExtractor.PATTERNS = {
+    bill_type: {
+        field: [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+        for field, patterns in fields.items()
+    }
+    for bill_type, fields in SustainabilityExtractor.PATTERNS.items()
+}
+
+# Display name for every vendor the patterns can match, keyed by lowercase match
+_VENDOR_CANON = {
+    'mseb': 'MSEB',
+    'maharashtra state electricity board': 'Maharashtra State Electricity Board',
+    'tata power': 'Tata Power',
+    'adani electricity': 'Adani Electricity',
+    'bescom': 'BESCOM',
+    'bangalore electricity': 'Bangalore Electricity',
+    'tneb': 'TNEB',
+    'tamil nadu electricity': 'Tamil Nadu Electricity',
+    'municipal corporation': 'Municipal Corporation',
+    'nagar nigam': 'Nagar Nigam',
+    'water department': 'Water Department',
+    'jal board': 'Jal Board',
+    'bmw': 'BMW',
+    'bangalore water supply': 'Bangalore Water Supply',
+    'indian oil': 'Indian Oil',
+    'ioc': 'IOC',
+    'bharat petroleum': 'Bharat Petroleum',
+    'bpcl': 'BPCL',
+    'hindustan petroleum': 'Hindustan Petroleum',
+    'hpcl': 'HPCL',
+    'reliance': 'Reliance',
+    'shell': 'Shell',
+    'bp': 'BP',
+    'total': 'Total'
+}
+
+# One group per bill type, named after the type it identifies
+_BILL_RE = re.compile(
+    r'(?P<electricity>electricity|power|kwh|units|mseb|bescom|tneb)'
+    r'|(?P<water>water|municipal|jal|litres|kilolitres)'
+    r'|(?P<fuel>petrol|diesel|fuel|indian oil|bpcl|hpcl)',
+    re.IGNORECASE
+)
+
+_DATE_RES = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})',
+        r'(\d{1,2}\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{2,4})',
+        r'date[:\s]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})'
+    )
+]
+
+def _init_worker():
+    """Load the Tesseract engine once per OCR worker process"""
+    global _API
+    # Dictionary variables only take effect when passed at init time
+    _API = PyTessBaseAPI(lang="eng", psm=PSM.SINGLE_BLOCK, oem=OEM.LSTM_ONLY, variables=TESS_VARIABLES)
+
+def _ocr_pages(data: bytes, content_type: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of an uploaded PDF or image (runs in an OCR worker)"""
+    texts = []
+    if content_type == 'application/pdf':
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            for number in range(start, stop):
+                pix = doc[number].get_pixmap(dpi=PDF_RENDER_DPI, colorspace=fitz.csGRAY, alpha=False)
+                image = Image.frombytes('L', (pix.width, pix.height), pix.samples)
+                texts.append(SustainabilityExtractor.extract_text_from_image(image))
+    else:
+        image = Image.open(io.BytesIO(data))
+        for number in range(start, stop):
+            image.seek(number)
+            texts.append(SustainabilityExtractor.extract_text_from_image(image))
+    return texts
+
+def _ocr_probe():
+    """Run the resident engine on a blank image (runs in an OCR worker)"""
+    _API.SetImage(Image.new('L', (100, 50), color=255))
+    _API.GetUTF8Text()
+
+def iso_now() -> str:
+    """Current UTC time as an ISO 8601 string, rebuilt at most once per second"""
+    global _TIMESTAMP_CACHE
+    second = int(time.time())
+    if second != _TIMESTAMP_CACHE[0]:
+        # Swapped in as one tuple so concurrent readers never see a torn pair
+        _TIMESTAMP_CACHE = (second, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(second)))
+    return _TIMESTAMP_CACHE[1]
+
+def _cache_key(content: bytes) -> str:
+    """OCR cache key for an upload"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+def _cache_get(key: str) -> Optional[str]:
+    """Cached extracted text for an upload, if any"""
+    text = _OCR_CACHE.get(key)
+    if text is not None:
+        _OCR_CACHE.move_to_end(key)
+    return text
+
+def _cache_put(key: str, text: str):
+    """Remember extracted text, evicting the least recently used entries"""
+    # Failed extractions are not cached so they get retried
+    if text:
+        _OCR_CACHE[key] = text
+        while len(_OCR_CACHE) > OCR_CACHE_SIZE:
+            _OCR_CACHE.popitem(last=False)
+
+async def extract_document_text(content: bytes, content_type: str) -> str:
+    """OCR every page of an uploaded PDF or (multi-page) image in parallel"""
+    key = _cache_key(content)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    
+    if content_type == 'application/pdf':
+        with fitz.open(stream=content, filetype="pdf") as doc:
+            page_count = doc.page_count
+    else:
+        page_count = getattr(Image.open(io.BytesIO(content)), 'n_frames', 1)
+    
+    # Split the pages into one contiguous range per worker, so the upload is
+    # shipped and parsed once per range rather than once per page
+    chunks = max(1, min(OCR_WORKERS, page_count))
+    bounds = [page_count * index // chunks for index in range(chunks + 1)]
+    loop = asyncio.get_running_loop()
+    chunk_texts = await asyncio.gather(*(
+        loop.run_in_executor(OCR_EXECUTOR, _ocr_pages, content, content_type, start, stop)
+        for start, stop in zip(bounds, bounds[1:])
+    ))
+    
+    text = "\n".join(page_text for texts in chunk_texts for page_text in texts if page_text)
+    _cache_put(key, text)
+    return text
+
+async def _refresh_health():
+    """Re-run the OCR probe every HEALTH_CACHE_SECONDS, off the request path"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(OCR_EXECUTOR, _ocr_probe)
+            _HEALTH_CACHE.update(ok=True, error=None)
+        except Exception as e:
+            _HEALTH_CACHE.update(ok=False, error=str(e))
+        await asyncio.sleep(HEALTH_CACHE_SECONDS)
+
+@app.on_event("startup")
+async def init_ocr_engine():
+    """Start the OCR worker processes"""
+    global OCR_EXECUTOR, _HEALTH_TASK
+    # Spawn rather than fork: the server process already runs threads
+    OCR_EXECUTOR = ProcessPoolExecutor(
+        max_workers=OCR_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    )
+    logger.info("OCR executor started with %d workers", OCR_WORKERS)
+    _HEALTH_TASK = asyncio.create_task(_refresh_health())
+
+@app.on_event("shutdown")
+async def shutdown_ocr_engine():
+    """Stop the OCR worker processes"""
+    global OCR_EXECUTOR, _HEALTH_TASK
+    if _HEALTH_TASK is not None:
+        _HEALTH_TASK.cancel()
+        _HEALTH_TASK = None
+    if OCR_EXECUTOR is not None:
+        OCR_EXECUTOR.shutdown(wait=True)
+        OCR_EXECUTOR = None
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -241,19 +471,18 @@ async def root():
 async def process_document(file: UploadFile = File(...)):
     """Process uploaded document and extract sustainability data"""
     
-    if not file.content_type or not file.content_type.startswith('image/'):
-        raise HTTPException(status_code=400, detail="Only image files are supported")
+    if not file.content_type or not (file.content_type.startswith('image/') or file.content_type == 'application/pdf'):
+        raise HTTPException(status_code=400, detail="Only image and PDF files are supported")
     
     try:
-        # Read file content
+        # Read file content; the encoded bytes are the cheapest thing to ship to a worker
         content = await file.read()
-        image = Image.open(io.BytesIO(content))
         
-        # Extract text using OCR
-        extracted_text = SustainabilityExtractor.extract_text_from_image(image)
+        # Extract text using OCR, one worker process per page
+        extracted_text = await extract_document_text(content, file.content_type)
         
         if not extracted_text:
-            raise HTTPException(status_code=400, detail="No text could be extracted from the image")
+            raise HTTPException(status_code=400, detail="No text could be extracted from the document")
         
         # Process extracted text
         result = SustainabilityExtractor.process_document(extracted_text)
@@ -261,86 +490,119 @@ async def process_document(file: UploadFile = File(...)):
         # Add metadata
         result['filename'] = file.filename
         result['fileSize'] = len(content)
-        result['processedAt'] = datetime.now().isoformat()
+        result['processedAt'] = iso_now()
         result['extractedText'] = extracted_text[:500]  # First 500 chars for debugging
         
-        logger.info(f"Successfully processed {file.filename}: {result['billType']} bill")
+        logger.info("Successfully processed %s: %s bill", file.filename, result['billType'])
         
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=result)
         
     except Exception as e:
-        logger.error(f"Error processing document {file.filename}: {e}")
+        logger.error("Error processing document %s: %s", file.filename, e)
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+@app.post("/process-documents-batch")
+async def process_documents_batch(files: List[UploadFile] = File(...)):
+    """Process several uploaded documents in one request"""
+    
+    for file in files:
+        if not file.content_type or not (file.content_type.startswith('image/') or file.content_type == 'application/pdf'):
+            raise HTTPException(status_code=400, detail=f"Only image and PDF files are supported: {file.filename}")
+    
+    try:
+        contents = [await file.read() for file in files]
+        
+        # Extract text using OCR in the worker processes, the same way /process-document does.
+        # A file that fails to open or OCR fails only its own entry, not the whole batch
+        extracted_texts = await asyncio.gather(*(
+            extract_document_text(content, file.content_type) for file, content in zip(files, contents)
+        ), return_exceptions=True)
+        
+        results = []
+        for file, content, extracted_text in zip(files, contents, extracted_texts):
+            if isinstance(extracted_text, Exception):
+                logger.error("Error processing document %s: %s", file.filename, extracted_text)
+                result = {'error': f"Processing failed: {extracted_text}"}
+                extracted_text = ""
+            elif extracted_text:
+                result = SustainabilityExtractor.process_document(extracted_text)
+            else:
+                result = {'error': "No text could be extracted from the document"}
+            
+            # Add metadata
+            result['filename'] = file.filename
+            result['fileSize'] = len(content)
+            result['processedAt'] = iso_now()
+            result['extractedText'] = extracted_text[:500]  # First 500 chars for debugging
+            results.append(result)
+        
+        logger.info("Successfully processed batch of %d documents", len(results))
+        
+        return ORJSONResponse(content={'documents': results, 'count': len(results)})
+        
+    except Exception as e:
+        logger.error("Error processing document batch: %s", e)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
 @app.post("/calculate-emissions")
 async def calculate_emissions(data: Dict[str, Any]):
     """Calculate carbon emissions from extracted data"""
     
-    # India-specific emission factors
-    EMISSION_FACTORS = {
-        'electricity': 0.82,  # kg CO2/kWh
-        'water': 0.0003,      # kg CO2/L
-        'petrol': 2.31,       # kg CO2/L
-        'diesel': 2.68,       # kg CO2/L
-        'waste': 0.5          # kg CO2/kg
-    }
-    
     try:
-        total_emissions = 0.0
-        breakdown = {}
+        # Total usage per bill type, then one vectorized multiply by the factors
+        usage = np.zeros(len(_EMISSION_BILL_TYPES))
+        present = [False] * len(_EMISSION_BILL_TYPES)
         
         for item in data.get('documents', []):
             bill_type = item.get('billType')
+            index = _EMISSION_INDEX.get(bill_type)
             
-            if bill_type == 'electricity' and 'energyUsage' in item:
-                emissions = item['energyUsage'] * EMISSION_FACTORS['electricity']
-                total_emissions += emissions
-                breakdown['electricity'] = emissions
-                
-            elif bill_type == 'water' and 'waterConsumption' in item:
-                emissions = item['waterConsumption'] * EMISSION_FACTORS['water']
-                total_emissions += emissions
-                breakdown['water'] = emissions
-                
-            elif bill_type == 'fuel' and 'fuelConsumption' in item:
-                # Assume diesel if not specified
-                emissions = item['fuelConsumption'] * EMISSION_FACTORS['diesel']
-                total_emissions += emissions
-                breakdown['fuel'] = emissions
+            if index is not None and USAGE_FIELDS[bill_type] in item:
+                usage[index] += item[USAGE_FIELDS[bill_type]]
+                present[index] = True
+        
+        emissions = usage * _EMISSION_FACTOR_VECTOR
+        total_emissions = float(emissions.sum())
+        breakdown = {
+            bill_type: value
+            for bill_type, value, found in zip(_EMISSION_BILL_TYPES, emissions.tolist(), present)
+            if found
+        }
         
         result = {
             'totalEmissions': round(total_emissions / 1000, 3),  # Convert to tonnes
             'breakdown': breakdown,
             'unit': 'tCO2e',
-            'calculatedAt': datetime.now().isoformat()
+            'calculatedAt': iso_now()
         }
         
-        return JSONResponse(content=result)
+        return ORJSONResponse(content=result)
         
     except Exception as e:
-        logger.error(f"Error calculating emissions: {e}")
+        logger.error("Error calculating emissions: %s", e)
         raise HTTPException(status_code=500, detail=f"Calculation failed: {str(e)}")
 
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
-    try:
-        # Test OCR functionality
-        test_image = Image.new('RGB', (100, 50), color='white')
-        test_text = pytesseract.image_to_string(test_image)
-        
+    # Report the last-known OCR probe result; the probe itself runs in _refresh_health
+    if _HEALTH_CACHE["ok"]:
         return {
             "status": "healthy",
             "ocr_available": True,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_now(),
             "version": "1.0.0"
         }
-    except Exception as e:
-        return {
-            "status": "unhealthy",
-            "error": str(e),
-            "timestamp": datetime.now().isoformat()
-        }
+    return {
+        "status": "unhealthy",
+        "error": _HEALTH_CACHE["error"],
+        "timestamp": iso_now()
+    }
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Worker processes re-import this module, so they size their OCR pools from the env.
+    # Two server workers keep the API responsive while leaving each OCR pool
+    # half the cores for parallel page and batch OCR
+    workers = int(os.environ.setdefault("WEB_WORKERS", str(min(2, os.cpu_count() or 1))))
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard], not on Windows)
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, workers=workers, loop="auto", http="auto")
\ No newline at end of file